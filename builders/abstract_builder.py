@@ -1,22 +1,25 @@
 from abc import ABC
-from typing import List, Optional, Dict
+from typing import List, Optional
 
 from tiles.tile import Coords
 from tiles.tile_type import TTypeExit
 from utils.graph_algorithms import get_maxmin_distance, unvisit_nodes, \
-    get_cluster_of_nodes, get_center_coords, get_surrounded_coords, Node
+    get_cluster_of_nodes, get_center_coords, get_surrounded_coords, GridGraph, \
+    grid_to_nodes
 
 
 class MazeBuilder(ABC):
-    def __init__(self, coordinated_nodes: Dict[Coords, Node], tower_limit: Optional[int] = None):
+    def __init__(self, grid: GridGraph, tower_limit: Optional[int] = None):
         """
         An abstract maze builder class. The maze builders try to build the
         optimal maze (the longest possible paths with minimal resources) for a given map.
 
         Args:
-            coordinated_nodes: the (Coords and) Nodes of the maze
+            grid: a GridGraph of the maze
             tower_limit: maximum number of towers allowed in the maze
         """
+        self.grid = grid
+        coordinated_nodes = grid_to_nodes(grid)
         self.coordinated_traversables = {k: v for k, v in coordinated_nodes.items() if v.ttype.is_traversable}
         self.coordinated_build_nodes = {k: v for k, v in self.coordinated_traversables.items() if
                                         v.ttype.allow_building}
@@ -86,7 +89,6 @@ class MazeBuilder(ABC):
         if len(self.spawn_nodes) < 2:
             return
 
-        unvisit_nodes(self.spawn_nodes)
         unvisited_spawn_nodes = set(self.spawn_nodes)
         redundant_spawn_coords = set()
         for node in self.spawn_nodes:
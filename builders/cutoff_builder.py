@@ -4,20 +4,20 @@ from typing import Dict, List, Set, Optional
 
 from builders import MazeBuilder
 from tiles.tile import Coords
-from tiles.tile_type import TTypeExit, TTypeOccupied, TTypeBasic
-from utils.graph_algorithms import get_nodes_on_shortest_paths_multiple, Node
+from utils.graph_algorithms import GridGraph, as_kernel_input, get_node_neighbor_indices, \
+    get_grid_tiles_on_shortest_paths_multiple
 
 
 class CutoffBuilder(MazeBuilder):
-    def __init__(self, coordinated_nodes: Dict[Coords, Node], tower_limit: Optional[int] = None):
+    def __init__(self, grid: GridGraph, tower_limit: Optional[int] = None):
         """
         Finds the optimal maze by recursively blocking the shortest path.
 
         Args:
-            coordinated_nodes: the (Coords and) Nodes of the maze
+            grid: a GridGraph of the maze
             tower_limit: maximum number of towers allowed in the maze
         """
-        super().__init__(coordinated_nodes, tower_limit)
+        super().__init__(grid, tower_limit)
         self.best_dists = None
         self.processed_coordinates: Dict[int, Set[Coords]] = dict()
         self.combination_counter = 0
@@ -25,6 +25,16 @@ class CutoffBuilder(MazeBuilder):
         self.n_first_nodes = 0
         self.start_time = None
 
+        # The paths are searched on the grid arrays, with the neighbors in
+        # the order of the Nodes' neighbor sets to keep the order of the results
+        width = self.grid.width
+        self.neighbors = as_kernel_input(get_node_neighbor_indices(self.grid, self.coordinated_traversables))
+        self.is_traversable = self.grid.is_traversable.copy()
+        self.is_exit = as_kernel_input(self.grid.is_exit)
+        self.spawn_indices = [node.coords.y * width + node.coords.x for node in self.spawn_nodes]
+        self.tile_coords = [Coords(index % width, index // width)
+                            for index in range(width * self.grid.height)]
+
     def generate_optimal_mazes(self) -> List[List[Coords]]:
         """
         Generate a maze where the shortest path is as long as possible by
@@ -44,7 +54,7 @@ class CutoffBuilder(MazeBuilder):
 
     def cut_off_path(self, combination: List[Coords], towers_left: int) -> None:
         """
-        Obtains all the Nodes on the shortest possible paths,
+        Obtains all the tiles on the shortest possible paths,
         and recursively for each of those builds a tower on them.
         All the checked combinations only include towers on the possible
         shortest paths.
@@ -54,14 +64,16 @@ class CutoffBuilder(MazeBuilder):
             towers_left: the number of towers left to build
         """
         # Find all the shortest paths and dist
-        dists, nodes = get_nodes_on_shortest_paths_multiple(self.spawn_nodes, TTypeExit,
-                                                            list(self.coordinated_traversables.values()))
+        dists, path_coords = get_grid_tiles_on_shortest_paths_multiple(self.neighbors, self.is_traversable,
+                                                                       self.is_exit, self.spawn_indices,
+                                                                       self.tile_coords)
         self.combination_counter += 1
 
-        # On the first run of this function, count the number of Nodes (first coordinate_nodes)
+        # On the first run of this function, count the number of buildable tiles (first coordinate_nodes)
         if towers_left == self.max_towers:
-            buildable_first_nodes = [node for node in nodes if node.ttype.allow_building]
-            self.n_first_nodes = len(buildable_first_nodes)
+            buildable_first_coords = [coords for coords in path_coords
+                                      if self.coordinated_traversables[coords].ttype.allow_building]
+            self.n_first_nodes = len(buildable_first_coords)
 
         # Unsolvable
         if not dists:
@@ -82,19 +94,20 @@ class CutoffBuilder(MazeBuilder):
 
         # Remove processed coordinates to avoid duplicate combinations
         for count in range(self.max_towers, towers_left, -1):
-            nodes = nodes - self.processed_coordinates[count]
+            path_coords = path_coords - self.processed_coordinates[count]
 
-        # Loop every found buildable node
-        for node in nodes:
-            if not node.ttype.allow_building:
+        # Loop every found buildable tile
+        for coords in path_coords:
+            if not self.coordinated_traversables[coords].ttype.allow_building:
                 continue
 
-            node.ttype = TTypeOccupied  # Place a tower on Node
-            self.cut_off_path(combination + [node.coords], towers_left - 1)
-            node.ttype = TTypeBasic
+            index = coords.y * self.grid.width + coords.x
+            self.is_traversable[index] = False  # Place a tower on the tile
+            self.cut_off_path(combination + [coords], towers_left - 1)
+            self.is_traversable[index] = True
 
             # Add coordinate as processed, mark deeper processed coordinates as unprocessed
-            self.processed_coordinates[towers_left].add(node.coords)
+            self.processed_coordinates[towers_left].add(coords)
             if towers_left > 1:
                 self.processed_coordinates[towers_left-1].clear()
 
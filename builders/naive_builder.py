@@ -1,27 +1,32 @@
 from itertools import combinations
 from math import comb
 from time import localtime, strftime
-from typing import Dict, List, Tuple, Optional
+from typing import List, Optional
 
+import numpy as np
 from tqdm import tqdm
 
 from builders import MazeBuilder
 from tiles.tile import Coords
-from tiles.tile_type import TTypeExit, TTypeOccupied, TTypeBasic
-from utils.graph_algorithms import Node, Distances, \
-    get_distances, reset_nodes
+from utils.graph_algorithms import Distances, GridGraph, as_kernel_input, get_grid_distances
 
 
 class NaiveBuilder(MazeBuilder):
-    def __init__(self, coordinated_nodes: Dict[Coords, Node], tower_limit: Optional[int] = None):
+    def __init__(self, grid: GridGraph, tower_limit: Optional[int] = None):
         """
         Finds the optimal maze by testing every single maze combination.
 
         Args:
-            coordinated_nodes: the (Coords and) Nodes of the maze
+            grid: a GridGraph of the maze
             tower_limit: maximum number of towers allowed in the maze
         """
-        super().__init__(coordinated_nodes, tower_limit)
+        super().__init__(grid, tower_limit)
+        # The combinations are tested on the grid arrays instead of the Nodes
+        self.is_traversable = self.grid.is_traversable.copy()
+        self.neighbors = as_kernel_input(self.grid.neighbors)
+        self.is_exit = as_kernel_input(self.grid.is_exit)
+        self.spawn_indices = as_kernel_input(np.array([node.coords.y * self.grid.width + node.coords.x
+                                                       for node in self.spawn_nodes], np.int32))
 
     def generate_optimal_mazes(self) -> List[List[Coords]]:
         """
@@ -67,7 +72,8 @@ class NaiveBuilder(MazeBuilder):
         """
         best_dists = None
         best_tower_coords = []
-        current_nodes = list(self.coordinated_traversables.values())
+        tile_indices = {coords: coords.y * self.grid.width + coords.x
+                        for coords in self.coordinated_build_nodes}
 
         combs = combinations(self.coordinated_build_nodes, tower_count)
 
@@ -78,9 +84,9 @@ class NaiveBuilder(MazeBuilder):
         t = tqdm(total=n_combs, unit=f' combinations', disable=disable_bar, position=0, leave=True, unit_scale=True)
 
         for combination in combs:
-            reset_nodes(current_nodes)
-            dists = self.calculate_maze_distances(self.spawn_nodes, self.coordinated_traversables, combination)
-            self.revert_to_buildables(self.coordinated_traversables, combination)
+            tower_indices = [tile_indices[coords] for coords in combination]
+            dists = self.calculate_maze_distances(tower_indices)
+            self.revert_to_buildables(tower_indices)
 
             t.update()
             if not dists:
@@ -95,42 +101,28 @@ class NaiveBuilder(MazeBuilder):
         t.close()
         return best_dists, best_tower_coords
 
-    @staticmethod
-    def calculate_maze_distances(spawn_nodes: List[Node],
-                                 current_nodes: Dict[Coords, Node],
-                                 combination: Tuple[Coords]) -> Optional[Distances]:
+    def calculate_maze_distances(self, tower_indices: List[int]) -> Optional[Distances]:
         """
-        Mark the given coordinates as towers/walls, and get the distance
-        between spawns and any exit Nodes.
+        Mark the tiles at the given indices as towers/walls, and get the
+        distance between spawns and any exit tiles.
 
         Args:
-            spawn_nodes: a list of spawn coordinate_nodes
-            current_nodes: a dictionary of all the Nodes currently in the graph
-            combination: a tuple of Coords which mark the towers
+            tower_indices: grid indices of the tiles which mark the towers
 
         Returns:
             Distances object with the distances between spawns and their closest exit
         """
-        for coords in combination:
-            node = current_nodes[coords]
-            node.ttype = TTypeOccupied
+        self.is_traversable[tower_indices] = False
+        return get_grid_distances(self.neighbors, self.is_traversable,
+                                  self.is_exit, self.spawn_indices)
 
-        dists = get_distances(spawn_nodes, TTypeExit, list(current_nodes.values()))
-
-        return dists
-
-    @staticmethod
-    def revert_to_buildables(current_nodes: Dict[Coords, Node],
-                             combination: Tuple[Coords]) -> None:
+    def revert_to_buildables(self, tower_indices: List[int]) -> None:
         """
-        Mark the given coordinates as buildables.
+        Mark the tiles at the given indices as buildables.
 
         Meant to undo the effects of calculate_maze_distances().
 
         Args:
-            current_nodes: a dictionary of all the Nodes currently in the graph
-            combination: a tuple of Coords which mark the coordinate_nodes
+            tower_indices: grid indices of the tiles which mark the towers
         """
-        for coords in combination:
-            node = current_nodes[coords]
-            node.ttype = TTypeBasic
+        self.is_traversable[tower_indices] = True
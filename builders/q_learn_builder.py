@@ -6,7 +6,7 @@ from tqdm import tqdm
 
 from builders import MazeBuilder
 from tiles.tile import Coords
-from utils.graph_algorithms import Node
+from utils.graph_algorithms import GridGraph
 
 
 class QState:
@@ -30,7 +30,7 @@ class QState:
 
 
 class QLearnBuilder(MazeBuilder):
-    def __init__(self, coordinated_nodes: Dict[Coords, Node], tower_limit: Optional[int] = None):
+    def __init__(self, grid: GridGraph, tower_limit: Optional[int] = None):
         """
         Tries to find the optimal maze by finding the longest path with Q-Learning.
 
@@ -38,10 +38,10 @@ class QLearnBuilder(MazeBuilder):
         spawn, and there is no tower limit.
 
         Args:
-            coordinated_nodes: the (Coords and) Nodes of the maze
+            grid: a GridGraph of the maze
             tower_limit: maximum number of towers allowed in the maze
         """
-        super().__init__(coordinated_nodes, tower_limit)
+        super().__init__(grid, tower_limit)
 
         self.alpha = 0.5
         self.epsilon = 0.4
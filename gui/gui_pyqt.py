@@ -1,46 +1,63 @@
-import threading
 from collections import deque
 from typing import Type, Dict, List, Optional, Tuple, NamedTuple, Deque
 
 import numpy as np
-from PyQt5.QtCore import Qt, pyqtSignal, pyqtSlot, QPoint, QRect, QSize
-from PyQt5.QtGui import QPalette, QMouseEvent, QColor, QKeySequence
+from PyQt5.QtCore import Qt, pyqtSignal, pyqtSlot, QPoint, QRect, QSize, \
+    QTimer, QObject, QThread
+from PyQt5.QtGui import QPalette, QImage, QMouseEvent, QColor, QKeySequence, \
+    QPainter, QPaintEvent, QResizeEvent
 from PyQt5.QtWidgets import QWidget, QMainWindow, QGridLayout, QFormLayout, \
     QLabel, QPushButton, QSpinBox, QCheckBox, QMenu, QAction, QMenuBar, \
     QActionGroup, QFileDialog, QDockWidget, QHBoxLayout, QVBoxLayout, \
-    QRubberBand, QGraphicsBlurEffect, QComboBox
+    QRubberBand, QComboBox
 
-from builders import CutoffBuilder, NaiveBuilder, QLearnBuilder
+from builders import MazeBuilder, CutoffBuilder, NaiveBuilder, QLearnBuilder
 from gui.colorer import Colorer
-from tiles.tile import Tile, Coords
-from tiles.tile_type import TType, TTypeOccupied, TTypeBasic, TTYPES
+from tiles.tile import Coords
+from tiles.tile_type import TType, TTypeOccupied, TTypeBasic, TTYPES, \
+    CODE_TTYPES, TTYPE_CODES
 from utils.errors import ValidationError
-from utils.graph_algorithms import tiles_to_nodes, Node, \
-    connect_all_neighboring_nodes
+from utils.graph_algorithms import GridGraph
 from utils.map_validation import MapValidator
 
 DEFAULT_SIZE = 6
 MINIMUM_SIZE = 2
+HIGHLIGHT_COLOR = QColor(255, 255, 255, 100)
+
+
+def coords_to_indices(coords_list: List[Coords], width: int) -> np.ndarray:
+    """
+    Convert a list of coordinates into indices of a flattened map.
+
+    Args:
+        coords_list: a list of Coords
+        width: width of the map
+
+    Returns:
+        an array of indices, where the index of a tile is y * width + x
+    """
+    positions = np.array(coords_list, np.intp).reshape(-1, 2)
+    return positions[:, 1] * width + positions[:, 0]
 
 
 class TTypeChange(NamedTuple):
-    widget: QWidget
+    coords: Coords
     old_ttype: Type[TType]
     new_ttype: Type[TType]
 
 
 class ColoredRectangle(QWidget):
+    # Palettes shared by all the ColoredRectangles, created when a tile type
+    # is first shown, as (normal, highlighted) pairs for each tile type
+    shared_palettes: Dict[Type[TType], Tuple[QPalette, QPalette]] = {}
+
     def __init__(self, ttype: Type[TType]):
         super(ColoredRectangle, self).__init__()
 
         self.setAutoFillBackground(True)
-        self.set_type_color(ttype)
         self.highlight: bool = False
-
-        highlight_effect = QGraphicsBlurEffect()
-        highlight_effect.setBlurRadius(4.0)
-        self.setGraphicsEffect(highlight_effect)
-        self.graphicsEffect().setEnabled(False)
+        self.ttype = ttype
+        self.set_type_color(ttype)
 
     def set_type_color(self, ttype: Type[TType]) -> None:
         """
@@ -49,31 +66,48 @@ class ColoredRectangle(QWidget):
         Args:
             ttype: a tile type whose defined color is to be used
         """
-        palette = self.palette()
-        palette.setColor(QPalette.Window, QColor(ttype.color))
-        self.setPalette(palette)
-
-    def toggle_highlight(self) -> None:
-        self.highlight = not self.highlight
-        self.graphicsEffect().setEnabled(self.highlight)
-
+        self.ttype = ttype
+        palettes = self.shared_palettes.get(ttype)
+        if palettes is None:
+            palettes = self.create_shared_palettes(ttype)
+        self.setPalette(palettes[self.highlight])
 
-class TileWidget(ColoredRectangle):
-    def __init__(self, tile: Tile):
-        super(TileWidget, self).__init__(tile.ttype)
+    @classmethod
+    def create_shared_palettes(cls, ttype: Type[TType]) -> Tuple[QPalette, QPalette]:
+        """
+        Create the shared palettes from the current color of a tile type.
 
-        self.tile = tile
+        Args:
+            ttype: a tile type whose defined color is to be used
 
-    def change_to_type(self, ttype: Type[TType]) -> None:
+        Returns:
+            the normal and the highlighted palette of the tile type
         """
-        Change the type of the Tile to the given type
+        color = QColor(ttype.color)
+        palette = QPalette()
+        palette.setColor(QPalette.Window, color)
+
+        # Highlight with a lighter color, or a visible one if transparent
+        highlight_palette = QPalette()
+        if color.alpha():
+            highlight_palette.setColor(QPalette.Window, color.lighter(150))
+        else:
+            highlight_palette.setColor(QPalette.Window, HIGHLIGHT_COLOR)
 
-        Args:
-            ttype: a new tile type
+        cls.shared_palettes[ttype] = (palette, highlight_palette)
+        return palette, highlight_palette
 
+    @classmethod
+    def clear_shared_palettes(cls) -> None:
         """
-        self.tile.ttype = ttype
-        self.set_type_color(ttype)
+        Discard the shared palettes, so that they are recreated from the
+        current colors of the tile types when next needed.
+        """
+        cls.shared_palettes.clear()
+
+    def toggle_highlight(self) -> None:
+        self.highlight = not self.highlight
+        self.set_type_color(self.ttype)
 
 
 class MapWidget(QWidget):
@@ -81,49 +115,236 @@ class MapWidget(QWidget):
 
     def __init__(self):
         """
-        The map area of the GUI, which is responsible for adding, changing,
-        removing, and showing TileWidgets, and handling their mouse events.
+        The map area of the GUI, which is responsible for storing, changing
+        and painting the tiles of the map, and handling their mouse events.
+
+        The tile types are stored as codes in a single array, and all the
+        tiles are painted by the MapWidget itself instead of having a widget
+        for every tile.
         """
         super(MapWidget, self).__init__()
 
         self.setAutoFillBackground(True)
-        self.map_grid = QGridLayout(self)
         self.spacing = 1
-        self.map_grid.setSpacing(self.spacing)
+
+        # Tile type codes, indexed by [y, x]
+        self.ttype_codes = np.empty((0, 0), np.int8)
+        self.cell_size = (1, 1)
+        # RGBA colors of the tile types, indexed by tile type codes
+        self.palette_colors = np.zeros(len(CODE_TTYPES), np.uint32)
+        self.refresh_colors()
 
         self.selected_ttype: Type[TType] = TTypeBasic
         self.start_point = QPoint()
         self.end_point = QPoint()
         self.rubber_band = QRubberBand(QRubberBand.Rectangle, self)
-        self.selected_widgets: List[TileWidget] = []
+
+        # Update the Rubberband at most once per frame while it is dragged
+        self.rubber_band_timer = QTimer(self)
+        self.rubber_band_timer.setSingleShot(True)
+        self.rubber_band_timer.setInterval(16)
+        self.rubber_band_timer.timeout.connect(self.update_rubber_band)
+        # Selected tiles, indexed by [y, x]
+        self.selected_tiles = np.zeros((0, 0), bool)
+        # Tiles (x0, y0, x1, y1) bounding the selection, None if nothing is selected
+        self.selection_bounds: Optional[Tuple[int, int, int, int]] = None
 
     def change_background_color(self, color) -> None:
         palette = self.palette()
         palette.setColor(QPalette.Window, QColor(color))
         self.setPalette(palette)
 
-    def add_tile_widget(self, tile_widget: TileWidget):
-        y = tile_widget.tile.y
-        x = tile_widget.tile.x
-        self.map_grid.addWidget(tile_widget, y, x)
+    def refresh_colors(self) -> None:
+        """
+        Update the tile colors to correspond with the colors of the tile types.
+        """
+        for code, ttype in enumerate(CODE_TTYPES):
+            self.palette_colors[code] = QColor(ttype.color).rgba()
+        self.update()
 
-    def remove_tile_widget(self, tile_widget: TileWidget):
-        self.map_grid.removeWidget(tile_widget)
+    def set_ttype_codes(self, ttype_codes: np.ndarray) -> None:
+        """
+        Replace the current map with the given one.
+
+        Args:
+            ttype_codes: a 2D array of tile type codes, indexed by [y, x]
+        """
+        # Reuse the selection mask if the size of the map does not change
+        if self.selected_tiles.shape == ttype_codes.shape:
+            self.clear_selection()
+        else:
+            self.selected_tiles = np.zeros(ttype_codes.shape, bool)
+            self.selection_bounds = None
+
+        self.ttype_codes = ttype_codes
+        self.update_cell_size()
+        self.update()
+
+    def change_ttype_codes(self, indices: np.ndarray, ttype_codes: np.ndarray) -> None:
+        """
+        Change the tile types of the given tiles, only repainting the
+        tiles whose type changes.
+
+        Args:
+            indices: an array of tile indices y * width + x
+            ttype_codes: an array of new tile type codes for the indices
+        """
+        current_codes = self.ttype_codes.ravel()
+        is_changed = current_codes[indices] != ttype_codes
+        changed = indices[is_changed]
+        current_codes[changed] = ttype_codes[is_changed]
+        if not changed.size:
+            return
+
+        # The painting covers the bounding rectangle of the area to be updated,
+        # so the changed tiles are updated at once by their bounding rectangle
+        ys, xs = np.divmod(changed, self.ttype_codes.shape[1])
+        self.update(self.get_area_rect(xs.min(), ys.min(), xs.max() + 1, ys.max() + 1))
+
+    def get_ttype(self, coords: Coords) -> Type[TType]:
+        return CODE_TTYPES[self.ttype_codes[coords.y, coords.x]]
+
+    def change_to_type(self, coords: Coords, ttype: Type[TType]) -> None:
+        """
+        Change the type of the tile in the given coordinates.
+
+        Args:
+            coords: coordinates of the tile
+            ttype: a new tile type
+        """
+        code = TTYPE_CODES[ttype]
+        if self.ttype_codes[coords.y, coords.x] == code:
+            return
+
+        self.ttype_codes[coords.y, coords.x] = code
+        self.update(self.get_tile_rect(coords))
+
+    def get_cell_size(self) -> Tuple[int, int]:
+        """
+        Get the size of a single tile, including the spacing between tiles.
+
+        Returns:
+            the width and the height of a tile in pixels
+        """
+        return self.cell_size
+
+    def update_cell_size(self) -> None:
+        """
+        Calculate the size of a single tile from the sizes of the MapWidget
+        and the map. Needs to be called whenever either of them changes.
+        """
+        height, width = self.ttype_codes.shape
+        self.cell_size = (max(self.width() // max(width, 1), 1),
+                          max(self.height() // max(height, 1), 1))
+
+    def resizeEvent(self, event: QResizeEvent) -> None:
+        self.update_cell_size()
+
+    def get_tile_rect(self, coords: Coords) -> QRect:
+        cell_w, cell_h = self.get_cell_size()
+        return QRect(coords.x * cell_w, coords.y * cell_h, cell_w, cell_h)
+
+    def get_area_rect(self, x0: int, y0: int, x1: int, y1: int) -> QRect:
+        """
+        Get the pixel area covering a rectangle of tiles.
+
+        Args:
+            x0: x of the first tile column
+            y0: y of the first tile row
+            x1: x of the column after the last one
+            y1: y of the row after the last one
+
+        Returns:
+            a rectangle covering the tiles in the MapWidget
+        """
+        cell_w, cell_h = self.get_cell_size()
+        return QRect(x0 * cell_w, y0 * cell_h, (x1 - x0) * cell_w, (y1 - y0) * cell_h)
+
+    def paintEvent(self, event: QPaintEvent) -> None:
+        height, width = self.ttype_codes.shape
+        if not width or not height:
+            return
+
+        # Only paint the tiles which are in the area to be updated
+        cell_w, cell_h = self.get_cell_size()
+        area = event.rect()
+        x0 = max(area.left() // cell_w, 0)
+        x1 = min(area.right() // cell_w + 1, width)
+        y0 = max(area.top() // cell_h, 0)
+        y1 = min(area.bottom() // cell_h + 1, height)
+
+        # Draw the tiles as a single image, and the selected tiles on top
+        tile_colors = self.palette_colors[self.ttype_codes[y0:y1, x0:x1]]
+        selected = self.selected_tiles[y0:y1, x0:x1]
+        images = [self.get_cell_pixels(tile_colors)]
+        if selected.any():
+            highlight_colors = np.where(selected, np.uint32(HIGHLIGHT_COLOR.rgba()),
+                                        np.uint32(0))
+            images.append(self.get_cell_pixels(highlight_colors))
+
+        painter = QPainter(self)
+        for pixels in images:
+            image = QImage(pixels.data, pixels.shape[1], pixels.shape[0],
+                           pixels.strides[0], QImage.Format_ARGB32)
+            painter.drawImage(x0 * cell_w, y0 * cell_h, image)
+        painter.end()
+
+    def get_cell_pixels(self, colors: np.ndarray) -> np.ndarray:
+        """
+        Expand tile colors into the pixels of their tiles, leaving the
+        spacing between the tiles transparent.
+
+        Args:
+            colors: a 2D array of ARGB colors, indexed by [y, x]
+
+        Returns:
+            a 2D array of ARGB pixels, indexed by [y, x]
+        """
+        rows, columns = colors.shape
+        cell_w, cell_h = self.get_cell_size()
+        pixels = np.zeros((rows, cell_h, columns, cell_w), np.uint32)
+        pixels[:, :cell_h - self.spacing, :, :cell_w - self.spacing] = colors[:, None, :, None]
+        return pixels.reshape(rows * cell_h, columns * cell_w)
 
     def clear_selection(self) -> None:
-        for tile_widget in self.selected_widgets:
-            pass
-            tile_widget.toggle_highlight()
-        self.selected_widgets.clear()
+        if self.selection_bounds is None:
+            return
+
+        # Only clear and repaint the area around the selected tiles
+        x0, y0, x1, y1 = self.selection_bounds
+        self.selected_tiles[y0:y1, x0:x1] = False
+        self.selection_bounds = None
+        self.update(self.get_area_rect(x0, y0, x1, y1))
+
+    def get_selected_coords(self) -> List[Coords]:
+        """
+        Get the coordinates of the selected tiles, only searching within
+        the bounds of the selection.
+
+        Returns:
+            a list of Coords of the selected tiles, ordered by their y and then by their x
+        """
+        if self.selection_bounds is None:
+            return []
+
+        x0, y0, x1, y1 = self.selection_bounds
+        selected_ys, selected_xs = np.nonzero(self.selected_tiles[y0:y1, x0:x1])
+        return list(map(Coords, (selected_xs + x0).tolist(), (selected_ys + y0).tolist()))
 
     @pyqtSlot(object)
     def on_ttype_selection(self, ttype: Type[TType]) -> None:
         self.selected_ttype = ttype
 
     @pyqtSlot(object)
-    def on_action_received(self, widgets_and_ttypes: List[Tuple]) -> None:
-        for widget, ttype in widgets_and_ttypes:
-            widget.change_to_type(ttype)
+    def on_action_received(self, coords_and_ttypes: List[Tuple]) -> None:
+        if not coords_and_ttypes:
+            return
+
+        # Change all the tiles at once, skipping the ones already of the type
+        coords_list, ttypes = zip(*coords_and_ttypes)
+        indices = coords_to_indices(coords_list, self.ttype_codes.shape[1])
+        ttype_codes = np.array([TTYPE_CODES[ttype] for ttype in ttypes], np.int8)
+        self.change_ttype_codes(indices, ttype_codes)
 
     @pyqtSlot(QMouseEvent)
     def mousePressEvent(self, event: QMouseEvent) -> None:
@@ -132,58 +353,70 @@ class MapWidget(QWidget):
         if event.button() == Qt.RightButton:
             self.right_button_clicked(event)
 
-    def get_clicked_tile_widget(self, pos: QPoint) -> Optional[TileWidget]:
+    def get_clicked_coords(self, pos: QPoint) -> Optional[Coords]:
         """
-        Get the TileWidget which resides in the given position.
+        Get the coordinates of the tile which resides in the given position.
 
         Args:
             pos: a pixel position relevant to the MapWidget
 
         Returns:
-            a TileWidget in the given position if there is one, otherwise None
+            Coords of the tile in the given position if there is one,
+            otherwise None
         """
-        tile_widgets = (self.map_grid.itemAt(i).widget() for i in
-                        range(self.map_grid.count()))
-        for tile_widget in tile_widgets:
-            if pos in tile_widget.geometry():
-                return tile_widget
+        height, width = self.ttype_codes.shape
+        cell_w, cell_h = self.get_cell_size()
+        x = pos.x() // cell_w
+        y = pos.y() // cell_h
+        if 0 <= x < width and 0 <= y < height:
+            return Coords(x, y)
         return None
 
-    def select_tile_widgets_in_area(self, selection_area: QRect) -> None:
+    def select_tiles_in_area(self, selection_area: QRect) -> None:
         """
-        Mark all the TileWidgets which intersect with the given area as
-        selected.
+        Mark all the tiles which intersect with the given area as selected.
 
         Args:
             selection_area: a rectangle area in the MapWidget
         """
-        tile_widgets = (self.map_grid.itemAt(i).widget() for i in
-                        range(self.map_grid.count()))
-        for tile_widget in tile_widgets:
-            if tile_widget.geometry().intersects(selection_area):
-                self.selected_widgets.append(tile_widget)
-                tile_widget.toggle_highlight()
+        height, width = self.ttype_codes.shape
+        cell_w, cell_h = self.get_cell_size()
+        x0 = max(selection_area.left() // cell_w, 0)
+        x1 = min(selection_area.right() // cell_w + 1, width)
+        y0 = max(selection_area.top() // cell_h, 0)
+        y1 = min(selection_area.bottom() // cell_h + 1, height)
+        if x0 >= x1 or y0 >= y1:
+            return
+
+        self.selected_tiles[y0:y1, x0:x1] = True
+        self.update(self.get_area_rect(x0, y0, x1, y1))
+
+        if self.selection_bounds is None:
+            self.selection_bounds = (x0, y0, x1, y1)
+        else:
+            bx0, by0, bx1, by1 = self.selection_bounds
+            self.selection_bounds = (min(x0, bx0), min(y0, by0), max(x1, bx1), max(y1, by1))
 
     def left_button_clicked(self, event: QMouseEvent) -> None:
-        tile_widget = self.get_clicked_tile_widget(event.pos())
+        coords = self.get_clicked_coords(event.pos())
         action: List[TTypeChange] = []
-        if tile_widget:
+        if coords:
 
             # If a selection exists and it was left clicked, fill
-            if self.selected_widgets and tile_widget in self.selected_widgets:
-                for selected_widget in self.selected_widgets:
-                    old_ttype = selected_widget.tile.ttype
-                    if old_ttype == self.selected_ttype:
+            if self.selected_tiles[coords.y, coords.x]:
+                for selected in self.get_selected_coords():
+                    old_ttype = self.get_ttype(selected)
+                    if old_ttype is self.selected_ttype:
                         continue
-                    selected_widget.change_to_type(self.selected_ttype)
-                    action.append(TTypeChange(selected_widget, old_ttype, self.selected_ttype))
+                    self.change_to_type(selected, self.selected_ttype)
+                    action.append(TTypeChange(selected, old_ttype, self.selected_ttype))
 
             # Change the type of the clicked tile
-            elif not self.selected_widgets:
-                old_ttype = tile_widget.tile.ttype
-                if not old_ttype == self.selected_ttype:
-                    tile_widget.change_to_type(self.selected_ttype)
-                    action.append(TTypeChange(tile_widget, old_ttype, self.selected_ttype))
+            elif self.selection_bounds is None:
+                old_ttype = self.get_ttype(coords)
+                if old_ttype is not self.selected_ttype:
+                    self.change_to_type(coords, self.selected_ttype)
+                    action.append(TTypeChange(coords, old_ttype, self.selected_ttype))
 
         self.clear_selection()
         if action:
@@ -201,9 +434,14 @@ class MapWidget(QWidget):
 
     def right_button_moved(self, event: QMouseEvent) -> None:
         if not self.start_point.isNull():
-            # Update the Rubberband
+            # Update the Rubberband once the throttling timer runs out
             self.end_point = event.pos()
-            self.rubber_band.setGeometry(QRect(self.start_point, self.end_point).normalized())
+            if not self.rubber_band_timer.isActive():
+                self.rubber_band_timer.start()
+
+    @pyqtSlot()
+    def update_rubber_band(self) -> None:
+        self.rubber_band.setGeometry(QRect(self.start_point, self.end_point).normalized())
 
     @pyqtSlot(QMouseEvent)
     def mouseReleaseEvent(self, event: QMouseEvent) -> None:
@@ -212,8 +450,9 @@ class MapWidget(QWidget):
 
     def right_button_released(self, event: QMouseEvent) -> None:
         # Update the Rubberband
+        self.rubber_band_timer.stop()
         self.end_point = QPoint(event.pos())
-        self.rubber_band.setGeometry(QRect(self.start_point, self.end_point).normalized())
+        self.update_rubber_band()
         self.rubber_band.hide()
 
         # Clear selection on right click (+ small jitter threshold)
@@ -222,7 +461,7 @@ class MapWidget(QWidget):
 
         # Create a selection
         else:
-            self.select_tile_widgets_in_area(self.rubber_band.geometry())
+            self.select_tiles_in_area(self.rubber_band.geometry())
 
 
 class SelectableTType(QWidget):
@@ -261,14 +500,13 @@ class TTypeContainer(QWidget):
 
         layout = QVBoxLayout()
 
-        ttypes = TTYPES.values()
-        self.selectable_ttypes = np.empty(len(ttypes), SelectableTType)
+        self.selectable_ttypes: List[SelectableTType] = []
         self.selected: Optional[SelectableTType] = None
 
-        for idx, ttype in enumerate(ttypes):
+        for ttype in TTYPES.values():
             selectable_ttype = SelectableTType(ttype)
             selectable_ttype.clicked.connect(self.on_clicked)
-            self.selectable_ttypes[idx] = selectable_ttype
+            self.selectable_ttypes.append(selectable_ttype)
             layout.addWidget(selectable_ttype)
 
         self.setLayout(layout)
@@ -279,7 +517,7 @@ class TTypeContainer(QWidget):
         Set initially the first SelectableTType as selected. Only
         meant to be called by the TTypeContainer constructor.
         """
-        if not self.selectable_ttypes.all():
+        if not self.selectable_ttypes:
             print('\nWarning: no selectable ttypes!\n')
             return
         selectable_ttype = self.selectable_ttypes[0]
@@ -326,9 +564,9 @@ class ActionLogger(QWidget):
 
         action = self.undo_stack.pop()
         self.redo_stack.append(action)
-        widgets_and_ttypes = [(ttype_change.widget, ttype_change.old_ttype) for
-                              ttype_change in action]
-        self.do_action.emit(widgets_and_ttypes)
+        coords_and_ttypes = [(ttype_change.coords, ttype_change.old_ttype) for
+                             ttype_change in action]
+        self.do_action.emit(coords_and_ttypes)
 
     def redo(self):
         if not self.redo_stack:
@@ -336,15 +574,76 @@ class ActionLogger(QWidget):
 
         action = self.redo_stack.pop()
         self.undo_stack.append(action)
-        widgets_and_ttypes = [(ttype_change.widget, ttype_change.new_ttype) for
-                              ttype_change in action]
-        self.do_action.emit(widgets_and_ttypes)
+        coords_and_ttypes = [(ttype_change.coords, ttype_change.new_ttype) for
+                             ttype_change in action]
+        self.do_action.emit(coords_and_ttypes)
 
     def clear(self) -> None:
         self.undo_stack.clear()
         self.redo_stack.clear()
 
 
+class MazeWorker(QObject):
+    # Whether the map was valid, and the tower coordinates of the best mazes
+    finished = pyqtSignal(bool, list)
+
+    def __init__(self, map_validator: MapValidator, grid: GridGraph,
+                 builder_class: Type[MazeBuilder], tower_limit: Optional[int]):
+        """
+        Validates a map and generates its optimal mazes in a worker thread.
+        The GUI is not touched, the results are sent with the finished signal.
+
+        Args:
+            map_validator: a validator for the map
+            grid: a GridGraph of the map
+            builder_class: the MazeBuilder used for generating the mazes
+            tower_limit: the maximum number of towers, None for no limit
+        """
+        super(MazeWorker, self).__init__()
+
+        self.map_validator = map_validator
+        self.grid = grid
+        self.builder_class = builder_class
+        self.tower_limit = tower_limit
+
+    @pyqtSlot()
+    def run(self) -> None:
+        """
+        Start the validation and optimal mazing for the map.
+        """
+        if self.initiate_map_validation():
+            self.finished.emit(True, self.initiate_optimal_mazing())
+        else:
+            self.finished.emit(False, [])
+
+    def initiate_map_validation(self) -> bool:
+        """
+        Initiate the map validation.
+
+        Returns:
+            True if the map is valid, else False
+        """
+        print('\nValidating map ...')
+        try:
+            self.map_validator.validate_grid(self.grid)
+            print(f'Map validation successful!')
+            return True
+        except ValidationError as e:
+            print(f'Map validation failed: {e.message}!')
+            return False
+
+    def initiate_optimal_mazing(self) -> List[List[Coords]]:
+        """
+        Initiate the optimal mazing.
+
+        Returns:
+            a list of tower coordinates for each of the best mazes
+        """
+        print('\nGenerating optimal maze ...')
+        builder = self.builder_class(self.grid, self.tower_limit)
+        return builder.generate_optimal_mazes()
+
+
 class Window(QMainWindow):
     def __init__(self, map_validator: MapValidator):
         super().__init__()
@@ -363,8 +662,11 @@ class Window(QMainWindow):
 
         self.neighbor_group = QActionGroup(self)
         self.color_profile_group = QActionGroup(self)
+        # Menu actions that change the map, disabled while a maze is generated
+        self.map_actions = []
 
         self.create_menubar()
+        self.neighbor_count = self.neighbor_group.checkedAction().data()
 
         main_layout = QGridLayout()
 
@@ -420,6 +722,12 @@ class Window(QMainWindow):
         self.variation_label = QLabel('Variations (1)')
         info_layout.addRow(self.variation_label, self.variation_box)
 
+        # Only show the last selected variation when the value changes rapidly
+        self.variation_timer = QTimer(self)
+        self.variation_timer.setSingleShot(True)
+        self.variation_timer.setInterval(50)
+        self.variation_timer.timeout.connect(self.show_selected_variation)
+
         info_widget.setLayout(info_layout)
         main_layout.addWidget(info_widget, 0, 3)
 
@@ -429,12 +737,16 @@ class Window(QMainWindow):
 
         self.buttons = [build_button, run_button]
 
-        self.tile_widgets = np.empty((DEFAULT_SIZE, DEFAULT_SIZE), TileWidget)
         self.previous_index = None
         self.best_tower_coords = []
+        self.best_tower_indices: List[np.ndarray] = []
+
+        # Preallocated memory for the tile type codes, reused between maps
+        self.ttype_codes_buffer = np.empty(0, np.int8)
 
         color_profile_name = self.colorer.color_profile_names[0]
         self.colorer.change_to_profile(color_profile_name)
+        ColoredRectangle.clear_shared_palettes()
         self.change_background_color(color_profile_name)
 
         self.ttype_container = TTypeContainer()
@@ -459,6 +771,7 @@ class Window(QMainWindow):
         import_action = QAction('Import...', self)
         import_action.triggered.connect(self.import_maze)
         maze_menu.addAction(import_action)
+        self.map_actions.append(import_action)
 
         export_action = QAction('Export...', self)
         export_action.triggered.connect(self.export_maze)
@@ -475,8 +788,15 @@ class Window(QMainWindow):
                                                    "npz (*.npz)")
         if file_path:
             np_file = np.load(file_path, allow_pickle=True)
-            tiles = np_file[np_file.files[0]]
-            self.build_from_tiles(tiles)
+            if 'ttype_codes' in np_file.files:
+                # Convert the saved codes to the current ones by the type names
+                code_lookup = np.array([TTYPE_CODES[TTYPES[name]]
+                                        for name in np_file['ttype_names']], np.int8)
+                self.build_from_codes(code_lookup[np_file['ttype_codes']])
+            else:
+                # Mazes saved as an array of Tiles
+                tiles = np_file[np_file.files[0]]
+                self.build_from_tiles(tiles)
 
     @pyqtSlot()
     def export_maze(self) -> None:
@@ -486,14 +806,15 @@ class Window(QMainWindow):
         Note that only the visual part of the current maze is saved,
         and the maze acts as if it has not been validated yet.
         """
-        tiles = self.get_tiles()
         file_path, _ = QFileDialog.getSaveFileName(self,
                                                    "Save File",
                                                    "maps",
                                                    "npz (*.npz)")
         if file_path:
             print(file_path)
-            np.savez_compressed(file_path, tiles)
+            np.savez_compressed(file_path,
+                                ttype_codes=self.map_widget.ttype_codes,
+                                ttype_names=[ttype.name for ttype in CODE_TTYPES])
 
     def add_edit_menu(self, menubar: QMenuBar) -> None:
         edit_menu = QMenu('Edit', self)
@@ -503,15 +824,19 @@ class Window(QMainWindow):
         undo_action.setShortcut(QKeySequence("Ctrl+z"))
         undo_action.triggered.connect(self.on_undo)
         edit_menu.addAction(undo_action)
+        self.map_actions.append(undo_action)
 
         redo_action = QAction('Redo', self)
         redo_action.setShortcut(QKeySequence("Ctrl+Shift+z"))
         redo_action.triggered.connect(self.on_redo)
         edit_menu.addAction(redo_action)
+        self.map_actions.append(redo_action)
 
+    @pyqtSlot()
     def on_undo(self) -> None:
         self.logger.undo()
 
+    @pyqtSlot()
     def on_redo(self) -> None:
         self.logger.redo()
 
@@ -533,12 +858,18 @@ class Window(QMainWindow):
 
         for count in [4, 8]:
             neighbor_action = QAction(str(count), self)
+            neighbor_action.setData(count)
             self.neighbor_group.addAction(neighbor_action)
             neighbor_action.setCheckable(True)
             neighbors_submenu.addAction(neighbor_action)
 
+        self.neighbor_group.triggered.connect(self.change_neighbor_count)
         self.neighbor_group.actions()[0].setChecked(True)
 
+    @pyqtSlot(QAction)
+    def change_neighbor_count(self, neighbor_action: QAction) -> None:
+        self.neighbor_count = neighbor_action.data()
+
     def add_color_profile_submenu(self, parent_menu: QMenu) -> None:
         """
         Add a submenu in which the color profile for the GUI is selected.
@@ -567,18 +898,21 @@ class Window(QMainWindow):
         color = self.colorer.get_background_color(color_profile_name)
         self.map_widget.change_background_color(color)
 
-    @pyqtSlot()
-    def change_color_profile(self) -> None:
+    @pyqtSlot(QAction)
+    def change_color_profile(self, color_profile_action: QAction) -> None:
         """
-        Change the colors of the GUI to the currently selected color profile.
+        Change the colors of the GUI to the selected color profile.
+
+        Args:
+            color_profile_action: the QAction of the selected color profile
         """
-        color_profile_name = self.color_profile_group.checkedAction().text()
+        color_profile_name = color_profile_action.text()
         self.colorer.change_to_profile(color_profile_name)
+        ColoredRectangle.clear_shared_palettes()
         self.change_background_color(color_profile_name)
 
         # Refresh the map colors
-        for tile_widget in self.tile_widgets.flatten():
-            tile_widget.set_type_color(tile_widget.tile.ttype)
+        self.map_widget.refresh_colors()
 
         # Refresh the ttype window colors
         self.ttype_container.refresh_selectable_ttype_colors()
@@ -619,11 +953,13 @@ class Window(QMainWindow):
         about_action.triggered.connect(self.show_about)
         help_menu.addAction(about_action)
 
-    def show_help(self):
+    @pyqtSlot()
+    def show_help(self) -> None:
         # todo: implement help
         print('clicked help')
 
-    def show_about(self):
+    @pyqtSlot()
+    def show_about(self) -> None:
         # todo: implement about
         print('clicked about')
 
@@ -638,66 +974,92 @@ class Window(QMainWindow):
     def tower_limiter_clicked(self) -> None:
         self.tower_limit_box.setDisabled(not self.tower_limiter.isChecked())
 
-    def variation_changed(self) -> None:
+    @pyqtSlot(int)
+    def variation_changed(self, value: int) -> None:
+        self.variation_timer.start()
+
+    @pyqtSlot()
+    def show_selected_variation(self) -> None:
         index = self.variation_box.value() - 1
         self.show_variation(index)
 
     def build(self) -> None:
         """
-        Build a rectangle area of TileWidgets.
+        Build a rectangle area of basic tiles.
         """
         self.clear_map()
         self.variation_box.setDisabled(True)
 
         width = self.width_box.value()
         height = self.height_box.value()
-        self.tile_widgets = np.empty((width, height), TileWidget)
-
-        for x in range(width):
-            for y in range(height):
-                tile = Tile(x=x, y=y)
-                tilew = TileWidget(tile)
-                self.map_widget.add_tile_widget(tilew)
-                self.tile_widgets[x, y] = tilew
+        ttype_codes = self.allocate_ttype_codes(width, height)
+        ttype_codes.fill(TTYPE_CODES[TTypeBasic])
+        self.map_widget.set_ttype_codes(ttype_codes)
 
     def build_from_tiles(self, tiles) -> None:
         """
-        Build a rectangle area of TileWidgets with given coordinated_nodes.
+        Build a rectangle area of tiles from the given Tiles.
         """
-        self.clear_map()
-        self.variation_box.setDisabled(True)
-
         # The ultimate tile is assumed to be in the bottom-right corner
         ultimate_tile = tiles[-1]
         width, height = ultimate_tile.x + 1, ultimate_tile.y + 1
 
+        # Write the codes of all the tiles at once
+        ttype_codes = np.zeros((height, width), np.int8)
+        ttype_codes[[tile.y for tile in tiles], [tile.x for tile in tiles]] = \
+            [TTYPE_CODES[tile.ttype] for tile in tiles]
+        self.build_from_codes(ttype_codes)
+
+    def build_from_codes(self, ttype_codes: np.ndarray) -> None:
+        """
+        Build a rectangle area of tiles from the given tile type codes.
+
+        Args:
+            ttype_codes: a 2D array of tile type codes, indexed by [y, x]
+        """
+        self.clear_map()
+        self.variation_box.setDisabled(True)
+
+        height, width = ttype_codes.shape
         self.width_box.setValue(width)
         self.height_box.setValue(height)
-        self.tile_widgets = np.empty((width, height), TileWidget)
+        codes = self.allocate_ttype_codes(width, height)
+        np.copyto(codes, ttype_codes)
+        self.map_widget.set_ttype_codes(codes)
 
-        for tile in tiles:
-            tilew = TileWidget(tile)
-            x, y = tile.x, tile.y
-            self.map_widget.add_tile_widget(tilew)
-            self.tile_widgets[x, y] = tilew
+    def allocate_ttype_codes(self, width: int, height: int) -> np.ndarray:
+        """
+        Get an uninitialized array for the tile type codes of a map. The
+        buffer is only reallocated when the map is larger than any before.
+
+        Args:
+            width: width of the map
+            height: height of the map
+
+        Returns:
+            a 2D array of tile type codes, indexed by [y, x]
+        """
+        size = width * height
+        if self.ttype_codes_buffer.size < size:
+            self.ttype_codes_buffer = np.empty(size, np.int8)
+        return self.ttype_codes_buffer[:size].reshape(height, width)
 
     def clear_map(self) -> None:
+        self.variation_timer.stop()
         self.logger.clear()
         self.best_tower_coords = []
+        self.best_tower_indices = []
 
-        if not self.tile_widgets.all():
-            return
-
-        for tilew in self.tile_widgets.flatten():
-            self.map_widget.remove_tile_widget(tilew)
-
-        self.tile_widgets = None
+    def get_tiles_arrays(self) -> Tuple[int, int, np.ndarray]:
+        """
+        Get the current map as a contiguous array of tile type codes.
 
-    def get_tiles(self) -> np.ndarray:
-        tiles = np.empty(np.size(self.tile_widgets), Tile)
-        for i, tilew in enumerate(self.tile_widgets.flatten()):
-            tiles[i] = tilew.tile
-        return tiles
+        Returns:
+            the width and the height of the map, and a copy of its tile type
+            codes, where the code of a tile is at the index y * width + x
+        """
+        height, width = self.map_widget.ttype_codes.shape
+        return width, height, self.map_widget.ttype_codes.ravel().copy()
 
     @pyqtSlot()
     def build_button_clicked(self) -> None:
@@ -706,12 +1068,11 @@ class Window(QMainWindow):
 
     @pyqtSlot()
     def run_button_clicked(self) -> None:
+        self.variation_timer.stop()
         self.disable_buttons(True)
         self.logger.clear()
         self.variation_box.setDisabled(True)
-        t1 = threading.Thread(target=self.create_maze)
-        t1.daemon = True
-        t1.start()
+        self.create_maze()
         self.setFocus()
 
     def disable_buttons(self, set_disable: bool) -> None:
@@ -724,54 +1085,61 @@ class Window(QMainWindow):
         for button in self.buttons:
             button.setDisabled(set_disable)
 
-    def create_maze(self):
+    def disable_map_editing(self, set_disable: bool) -> None:
         """
-        Start the validation and optimal mazing for the current map.
-        """
-        neighbor_count = int(self.neighbor_group.checkedAction().text())
-        tiles = self.get_tiles()
-        coordinated_nodes = tiles_to_nodes(tiles)
-        connect_all_neighboring_nodes(coordinated_nodes, neighbor_count)
+        Disable or enable the map and the menu actions that change it, so
+        that the map stays the same while a maze is generated for it.
 
-        if self.initiate_map_validation(np.array(list(coordinated_nodes.values())),):
-            self.initiate_optimal_mazing(coordinated_nodes)
+        Args:
+            set_disable: True to disable editing, False to enable
+        """
+        self.map_widget.setDisabled(set_disable)
+        for action in self.map_actions:
+            action.setDisabled(set_disable)
 
-    def initiate_map_validation(self, nodes: np.ndarray) -> bool:
+    def create_maze(self) -> None:
         """
-        Initiate the map validation.
+        Start the validation and optimal mazing for the current map in a
+        worker thread, whose results are shown in maze_finished.
+        """
+        width, height, ttype_codes = self.get_tiles_arrays()
+        grid = GridGraph(width, height, ttype_codes, self.neighbor_count)
 
-        Args:
-            nodes: an array of Nodes
+        tower_limit = None
+        if self.tower_limiter.isChecked():
+            tower_limit = self.tower_limit_box.value()
+        builder_class = self.builders[self.builder_drop_down.currentText()]
 
-        Returns:
-            True if the map is valid, else False
-        """
-        print('\nValidating map ...')
-        try:
-            self.map_validator.validate_map(nodes)
-            print(f'Map validation successful!')
-            return True
-        except ValidationError as e:
-            print(f'Map validation failed: {e.message}!')
-            self.disable_buttons(False)
-            return False
+        self.disable_map_editing(True)
+
+        # The thread has no parent, as Qt aborts if it is destroyed with the
+        # Window while a maze is still being generated
+        self.maze_thread = QThread()
+        self.maze_worker = MazeWorker(self.map_validator, grid, builder_class, tower_limit)
+        self.maze_worker.moveToThread(self.maze_thread)
+        self.maze_thread.started.connect(self.maze_worker.run)
+        self.maze_worker.finished.connect(self.maze_finished)
+        self.maze_thread.start()
 
-    def initiate_optimal_mazing(self, coordinated_nodes: Dict[Coords, Node]) -> None:
+    @pyqtSlot(bool, list)
+    def maze_finished(self, map_valid: bool, best_tower_coords: List[List[Coords]]) -> None:
         """
-        Initiate the optimal mazing, and show one of the solutions.
+        Show one of the generated mazes, once the worker thread has finished.
 
         Args:
-            coordinated_nodes: a dictionary with Coords as keys and Nodes as values
+            map_valid: whether the map passed the validation
+            best_tower_coords: a list of tower coordinates for each of the best mazes
         """
-        print('\nGenerating optimal maze ...')
-        tower_limit = None
-        if self.tower_limiter.isChecked():
-            tower_limit = self.tower_limit_box.value()
+        self.maze_thread.quit()
+        self.maze_thread.wait()
 
-        builder_class = self.builders[self.builder_drop_down.currentText()]
-        builder = builder_class(coordinated_nodes, tower_limit)
+        self.disable_map_editing(False)
 
-        self.best_tower_coords = builder.generate_optimal_mazes()
+        # Index by the map the maze was generated for
+        self.best_tower_coords = best_tower_coords
+        width = self.maze_worker.grid.width
+        self.best_tower_indices = [coords_to_indices(tower_coords, width)
+                                   for tower_coords in self.best_tower_coords]
 
         if self.best_tower_coords:
             maze_count = len(self.best_tower_coords)
@@ -781,13 +1149,14 @@ class Window(QMainWindow):
             # Show the variation which has the least towers (only for NaiveBuilder)
             self.previous_index = None
             index = 0
-            if self.variation_box.value() == index + 1:
-                self.show_variation(index)
-            self.variation_box.setValue(index + 1)  # todo: changing variation and running again can cause crashing
+            self.show_variation(index)
+            self.variation_box.blockSignals(True)
+            self.variation_box.setValue(index + 1)
+            self.variation_box.blockSignals(False)
             self.variation_box.setDisabled(False)
             print('\nMaze generated!')
 
-        else:
+        elif map_valid:
             print('\nCannot create a maze!')
 
         self.disable_buttons(False)
@@ -803,13 +1172,16 @@ class Window(QMainWindow):
             print('Variation does not exist!')
             return
 
-        # Remove the towers of the previous setup
-        if self.previous_index is not None:
-            for coords in self.best_tower_coords[self.previous_index]:
-                self.tile_widgets[coords.x, coords.y].change_to_type(TTypeBasic)
-
         # Add the new towers
-        for coords in self.best_tower_coords[index]:
-            self.tile_widgets[coords.x, coords.y].change_to_type(TTypeOccupied)
+        indices = self.best_tower_indices[index]
+        ttype_codes = np.full(indices.size, TTYPE_CODES[TTypeOccupied], np.int8)
+
+        # Remove the towers of the previous setup, which are not in the new one
+        if self.previous_index is not None:
+            removed = np.setdiff1d(self.best_tower_indices[self.previous_index], indices)
+            indices = np.concatenate((removed, indices))
+            ttype_codes = np.concatenate(
+                (np.full(removed.size, TTYPE_CODES[TTypeBasic], np.int8), ttype_codes))
 
+        self.map_widget.change_ttype_codes(indices, ttype_codes)
         self.previous_index = index
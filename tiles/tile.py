@@ -9,6 +9,8 @@ class Coords(NamedTuple):
 
 
 class Tile:
+    __slots__ = ('x', 'y', 'coords', 'ttype')
+
     def __init__(self, x, y, ttype: Type[TType] = TTypeBasic):
         """
         A square tile which is a component of a map.
@@ -22,3 +24,11 @@ class Tile:
         self.y = y
         self.coords = Coords(self.x, self.y)
         self.ttype = ttype
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        # Also restores the Tiles pickled with a __dict__, before the slots
+        for name, value in state.items():
+            setattr(self, name, value)
@@ -1,6 +1,9 @@
 from abc import ABC
 
+import numpy as np
 
+
+# Tile types are used as classes and never instantiated, compare them with 'is'
 class TType(ABC):
     name = NotImplemented
     allow_building = NotImplemented     # can place a tower
@@ -90,3 +93,13 @@ TTYPES = {
     'occupied': TTypeOccupied,
     'path': TTypePath,
 }
+
+# Compact integer codes of the tile types, used for storing a map in arrays
+CODE_TTYPES = tuple(TTYPES.values())
+TTYPE_CODES = {ttype: code for code, ttype in enumerate(CODE_TTYPES)}
+
+# Tile type flags as boolean arrays indexed by the tile type codes, so that
+# a flag can be looked up for a whole array of codes at once
+CODE_IS_TRAVERSABLE = np.array([ttype.is_traversable for ttype in CODE_TTYPES])
+CODE_IS_SPAWN = np.array([ttype.is_spawn for ttype in CODE_TTYPES])
+CODE_IS_EXIT = np.array([ttype.is_exit for ttype in CODE_TTYPES])
@@ -1,18 +1,22 @@
-from queue import Queue
+from bisect import insort
 from typing import Dict, Type, Set, List, Optional
 
 import numpy as np
 
 from tiles.tile import Coords
-from tiles.tile_type import TType
+from tiles.tile_type import TType, CODE_TTYPES, CODE_IS_TRAVERSABLE, \
+    CODE_IS_SPAWN, CODE_IS_EXIT
+from utils.jit import njit, NUMBA_AVAILABLE
 
 NEIGHBOR_DELTAS = {
-    4: [(0, 1), (-1, 0), (1, 0), (0, -1)],
-    8: [(-1, 1), (0, 1), (1, 1), (-1, 0), (1, 0), (-1, -1), (0, -1), (1, -1)]
+    4: ((0, 1), (-1, 0), (1, 0), (0, -1)),
+    8: ((-1, 1), (0, 1), (1, 1), (-1, 0), (1, 0), (-1, -1), (0, -1), (1, -1))
 }
 
 
 class Node:
+    __slots__ = ('coords', 'ttype', 'visited', 'neighbors')
+
     def __init__(self, coords: Coords, ttype: Type[TType]):
         """
         A node used in a graph.
@@ -21,398 +25,513 @@ class Node:
             coords: coordinates (Coords) of the node in a built map
             ttype: tile type that the node is based on
         """
-        self._coords = coords
-        self._ttype = ttype
-        self._visited = False
-        self._distance = 0
+        self.coords = coords
+        self.ttype = ttype
+        self.visited = False
         self.neighbors: Set["Node"] = set()
 
     def __eq__(self, other):
         if isinstance(other, Node):
-            return self._coords == other._coords
-        return self._coords == other
+            return self.coords == other.coords
+        return self.coords == other
 
     def __hash__(self):
-        return hash(self._coords)
+        return hash(self.coords)
 
     def __repr__(self):
-        return f'<Node at {self._coords} {self._ttype}>'
-
-    @property
-    def coords(self) -> Coords:
-        return self._coords
-
-    @coords.setter
-    def coords(self, coords: Coords) -> None:
-        self._coords = coords
-
-    @property
-    def ttype(self) -> Type[TType]:
-        return self._ttype
-
-    @ttype.setter
-    def ttype(self, ttype: Type[TType]) -> None:
-        self._ttype = ttype
+        return f'<Node at {self.coords} {self.ttype}>'
 
-    @property
-    def visited(self) -> bool:
-        return self._visited
-
-    @visited.setter
-    def visited(self, is_visited: bool) -> None:
-        self._visited = is_visited
-
-    @property
-    def distance(self) -> int:
-        return self._distance
-
-    @distance.setter
-    def distance(self, dist: int) -> None:
-        self._distance = dist
-
-    def connect_undirected(self, node: "Node") -> None:
+    def connect_directed(self, node: "Node") -> None:
         self.neighbors.add(node)
-        node.neighbors.add(self)
 
-    def remove_undirected(self, node: "Node") -> None:
-        self.neighbors.discard(node)
-        node.neighbors.discard(self)
 
-    def connect_directed(self, node: "Node") -> None:
-        self.neighbors.add(node)
+class GridGraph:
+    def __init__(self, width: int, height: int, ttype_codes: np.ndarray, neighbor_count: int):
+        """
+        A graph of a rectangular map, stored in arrays. Each node of the graph
+        is referred to by the index y * width + x of its tile.
 
-    def remove_directed(self, node: "Node") -> None:
-        self.neighbors.discard(node)
+        Args:
+            width: width of the map
+            height: height of the map
+            ttype_codes: a flat array of tile type codes of the map
+            neighbor_count: the number of neighbors a node can have
+        """
+        self.width = width
+        self.height = height
+        self.ttype_codes = ttype_codes
+        self.neighbors = get_grid_neighbors(width, height, neighbor_count)
 
-    def remove_all_undirected(self) -> None:
-        for neighbor in self.neighbors:
-            neighbor.remove_directed(self)
-        self.neighbors = set()
+        self.is_traversable = CODE_IS_TRAVERSABLE[ttype_codes]
+        self.is_spawn = CODE_IS_SPAWN[ttype_codes]
+        self.is_exit = CODE_IS_EXIT[ttype_codes]
 
 
 class Distances:
-    def __init__(self):
+    def __init__(self, dists: Optional[List[int]] = None):
         """
         Holds a list of distances between Nodes. Two instances are compared
-        in an ascending order.
+        in an ascending order, so the list is kept sorted on insertion.
+
+        Args:
+            dists: optional initial distances
         """
-        self.dists = []
+        self.dists = sorted(dists) if dists is not None else []
 
     def __repr__(self):
         return f'<Distances {self.dists}>'
 
     def append(self, item: int) -> None:
-        self.dists.append(item)
-
-    def sort(self) -> None:
-        self.dists.sort()
+        insort(self.dists, item)
 
     def __gt__(self, other: "Distances") -> bool:
-        self.sort()
-        other.sort()
         return self.dists > other.dists
 
     def __ge__(self, other: "Distances") -> bool:
-        self.sort()
-        other.sort()
         return self.dists >= other.dists
 
     def __eq__(self, other: "Distances") -> bool:
-        self.sort()
-        other.sort()
         return self.dists == other.dists
 
 
-def tiles_to_nodes(tiles: np.ndarray) -> Dict[Coords, Node]:
+def codes_to_nodes(width: int, height: int, ttype_codes: np.ndarray) -> Dict[Coords, Node]:
     """
-    Create Node objects from Tiles.
+    Create Node objects from the tile type codes of a map.
 
     Args:
-        tiles: an array of Tiles
+        width: width of the map
+        height: height of the map
+        ttype_codes: a flat array of tile type codes, where the code of a
+                     tile is at the index y * width + x
 
     Returns:
         a dictionary with Coords as keys and Nodes as values
     """
     nodes = {}
-    for tile in tiles:
-        coords = tile.coords
-        node = Node(coords, tile.ttype)
-        nodes[coords] = node
+    codes = ttype_codes.tolist()
+    for x in range(width):
+        for y in range(height):
+            coords = Coords(x, y)
+            nodes[coords] = Node(coords, CODE_TTYPES[codes[y * width + x]])
 
     return nodes
 
 
-def connect_all_neighboring_nodes(coordinate_nodes: Dict[Coords, Node], neighbor_count: int) -> None:
+def get_grid_neighbors(width: int, height: int, neighbor_count: int) -> np.ndarray:
     """
-    Connect all the given Nodes together, so that a single Node is
-    connected to its 4 or 8 possible neighbors.
+    Calculate the neighbors of every tile in a rectangular map.
 
     Args:
-        coordinate_nodes: a dictionary with Coords as keys and connectable Nodes as values
-        neighbor_count: the number of neighbors a Node can have
+        width: width of the map
+        height: height of the map
+        neighbor_count: the number of neighbors a tile can have
+
+    Returns:
+        an array with a row of neighbor indices for every tile index, in the
+        order of NEIGHBOR_DELTAS, with -1 for neighbors outside the map
     """
     deltas = NEIGHBOR_DELTAS[neighbor_count]
-    for coords, node in coordinate_nodes.items():
+    xs = np.tile(np.arange(width), height)
+    ys = np.repeat(np.arange(height), width)
+    neighbors = np.full((width * height, len(deltas)), -1, np.int32)
+
+    for k, (dx, dy) in enumerate(deltas):
+        neighbor_xs = xs + dx
+        neighbor_ys = ys + dy
+        inside = (0 <= neighbor_xs) & (neighbor_xs < width) & \
+                 (0 <= neighbor_ys) & (neighbor_ys < height)
+        neighbors[inside, k] = neighbor_ys[inside] * width + neighbor_xs[inside]
 
-        for coords2 in [Coords(*tuple(map(sum, zip(coords, delta)))) for delta in deltas]:
-            if coords2 in coordinate_nodes.keys():
-                node.connect_directed(coordinate_nodes[coords2])
+    return neighbors
 
 
-def reset_nodes(nodes: List[Node]) -> None:
+def grid_to_nodes(grid: GridGraph) -> Dict[Coords, Node]:
     """
-    Reset all given Nodes.
+    Create connected Node objects from a GridGraph.
 
     Args:
-        nodes: a list of resetable Nodes
+        grid: a GridGraph of a map
+
+    Returns:
+        a dictionary with Coords as keys and Nodes as values
     """
-    for node in nodes:
-        reset_node(node)
+    coordinate_nodes = codes_to_nodes(grid.width, grid.height, grid.ttype_codes)
+    width = grid.width
+    indexed_nodes = [None] * len(coordinate_nodes)
+    for coords, node in coordinate_nodes.items():
+        indexed_nodes[coords.y * width + coords.x] = node
+
+    neighbors = grid.neighbors.tolist()
+    for coords, node in coordinate_nodes.items():
+        for index in neighbors[coords.y * width + coords.x]:
+            if index != -1:
+                node.connect_directed(indexed_nodes[index])
 
+    return coordinate_nodes
 
-def reset_node(node: Node) -> None:
+
+@njit(nogil=True, cache=True)
+def label_traversable_components(neighbors: np.ndarray, is_traversable: np.ndarray) -> np.ndarray:
     """
-    Reset a single Node's data, while not reseting the neighbors.
+    Label the connected areas of traversable tiles in a GridGraph.
 
     Args:
-        node: a Node to be reset
+        neighbors: the neighbors of a GridGraph
+        is_traversable: a boolean array marking the traversable tiles
+
+    Returns:
+        an array with the same label for the tiles of a connected area,
+        and -1 for untraversable tiles
     """
-    node.visited = False
-    node.distance = 0
+    tile_count = is_traversable.shape[0]
+    labels = np.full(tile_count, -1, np.int32)
+    stack = np.empty(tile_count, np.int32)
+    label = 0
 
+    for start in range(tile_count):
+        if labels[start] != -1 or not is_traversable[start]:
+            continue
 
-def unvisit_nodes(nodes: List[Node]) -> None:
-    for node in nodes:
-        node.visited = False
+        labels[start] = label
+        stack[0] = start
+        stack_size = 1
+        while stack_size:
+            stack_size -= 1
+            index = stack[stack_size]
+            for k in range(neighbors.shape[1]):
+                neighbor = neighbors[index, k]
+                if neighbor != -1 and is_traversable[neighbor] and labels[neighbor] == -1:
+                    labels[neighbor] = label
+                    stack[stack_size] = neighbor
+                    stack_size += 1
+        label += 1
+
+    return labels
 
 
-def reset_node_fully(node: Node) -> None:
+def as_kernel_input(array: np.ndarray):
     """
-    Reset a single Node's data, including the reference of neighbors.
+    Prepare an array to be given to the grid kernels. Lists are much faster
+    to index than arrays in regular Python, so the array is converted to a
+    list when Numba is not available.
 
     Args:
-        node: a Node to be reset
+        array: an array to be indexed by a kernel
+
+    Returns:
+        the array itself when the kernels are compiled, else a list of it
     """
-    reset_node(node)
-    node.neighbors = set()
+    if NUMBA_AVAILABLE:
+        return array
+    return array.tolist()
 
 
-def depth_first_search_any_ttype(node, ending_ttype: Type[TType]) -> Node:
+@njit(nogil=True, cache=True)
+def get_grid_closest_distances(neighbors, is_traversable, is_ending, starting_indices) -> np.ndarray:
     """
-    Using a recursive DFS, find any Node with the given tile type.
+    Calculate the distances between starting tiles and their closest ending
+    tiles in a GridGraph, with a single breadth-first search outwards from
+    all the ending tiles, stopping once every starting tile is reached.
+
+    Only indexing is used on the inputs, so they can be given as arrays when
+    the function is compiled, and as faster to index lists when it is not.
+
     Args:
-        node: starting/current Node
-        ending_ttype: the tile type to be found
+        neighbors: the neighbors of a GridGraph
+        is_traversable: booleans marking the traversable tiles
+        is_ending: booleans marking the tiles to end a path on
+        starting_indices: the indices of the starting tiles
 
     Returns:
-        a Node with the given tile type, or None if none is connected
+        an array with the distance of each starting tile, or an empty array
+        if even a single path is unavailable
     """
-    node.visited = True
-
-    for neighbor in node.neighbors:
+    tile_count = len(is_traversable)
+    distances = [-1] * tile_count
+    queue = [0] * tile_count
+    tail = 0
+    for index in range(tile_count):
+        if is_ending[index]:
+            distances[index] = 0
+            queue[tail] = index
+            tail += 1
+
+    is_starting = [False] * tile_count
+    remaining = 0
+    for start in starting_indices:
+        if not is_starting[start]:
+            is_starting[start] = True
+            remaining += 1
+
+    head = 0
+    while head < tail and remaining:
+        index = queue[head]
+        head += 1
+        for neighbor in neighbors[index]:
+            if neighbor == -1 or distances[neighbor] != -1 or not is_traversable[neighbor]:
+                continue
+            distances[neighbor] = distances[index] + 1
+            if is_starting[neighbor]:
+                remaining -= 1
+            queue[tail] = neighbor
+            tail += 1
 
-        if not neighbor.visited and neighbor.ttype.is_traversable:
+    result = np.empty(len(starting_indices), np.int32)
+    if remaining:
+        return result[:0]
+    for i in range(len(starting_indices)):
+        result[i] = distances[starting_indices[i]]
 
-            if neighbor.ttype == ending_ttype:
-                return neighbor
-            ending_node = depth_first_search_any_ttype(neighbor, ending_ttype)
-            if ending_node:
-                return ending_node
+    return result
 
 
-def get_shortest_distance_any(starting_node: Node, ending_type: Type[TType],
-                              node_count: int) -> Optional[int]:
+def get_grid_distances(neighbors: np.ndarray, is_traversable: np.ndarray,
+                       is_ending: np.ndarray, starting_indices: np.ndarray) -> Optional[Distances]:
     """
-    Calculate and return the distance between a Node and any other Node
-    corresponding to the given type.
+    Calculate and return the distances between starting tiles and their
+    closest ending tiles in a GridGraph. The inputs that stay the same
+    between calls are expected to be prepared once with as_kernel_input().
 
     Args:
-        starting_node: a starting Node for the graph algorithm
-        ending_type: the tile type to be found
-        node_count: maximum number of Nodes in a Queue
+        neighbors: the prepared neighbors of a GridGraph
+        is_traversable: a boolean array marking the traversable tiles
+        is_ending: prepared booleans marking the tiles to end a path on
+        starting_indices: the prepared indices of the starting tiles
 
     Returns:
-        the distance between the given Node and any Node of the given type,
-        or None if a path is not available
+        a Distances object with distances of each starting tile, or None
+        if even a single path is unavailable
     """
-    starting_node.visited = True
-    starting_node.distance = 0
-    queue = Queue(maxsize=node_count-1)
-    queue.put(starting_node)
-    while not queue.empty():
-        node = queue.get()
-        for neighbor in node.neighbors:
-            if not neighbor.visited and neighbor.ttype.is_traversable:
-                if neighbor.ttype == ending_type:
-                    return node.distance + 1
-                neighbor.visited = True
-                neighbor.distance = node.distance + 1
-                queue.put(neighbor)
+    distances = get_grid_closest_distances(neighbors, as_kernel_input(is_traversable),
+                                           is_ending, starting_indices)
+    if not distances.size:
+        return None
 
+    return Distances(distances.tolist())
 
-def get_closest_any(starting_node: Node, ending_type: Type[TType],
-                    node_count: int) -> Optional[Node]:
+
+def get_node_neighbor_indices(grid: GridGraph, coordinate_nodes: Dict[Coords, Node]) -> np.ndarray:
     """
-    Find a Node of the given type that is closest to the starting Node.
+    Get the neighbors of Nodes as tile indices of a GridGraph. The neighbors
+    of each Node are listed in the iteration order of its neighbor set, so
+    grid algorithms using them find tiles in the same order as the Node
+    algorithms.
 
     Args:
-        starting_node: a starting Node for the graph algorithm
-        ending_type: the tile type to be found
-        node_count: maximum number of Nodes in a Queue
+        grid: the GridGraph the Nodes were created from
+        coordinate_nodes: a dictionary with Coords as keys and Nodes as values
 
     Returns:
-        the closest Node corresponding to the given tile type from the starting
-        Node, or None if no path is available
+        an array with the neighbor indices of each tile, padded with -1, with
+        only -1 for the tiles without a Node
     """
-    starting_node.visited = True
-    starting_node.distance = 0
-    queue = Queue(maxsize=node_count-1)
-    queue.put(starting_node)
-    while not queue.empty():
-        node = queue.get()
-        for neighbor in node.neighbors:
-            if not neighbor.visited and neighbor.ttype.is_traversable:
-                neighbor.visited = True
-                neighbor.distance = node.distance + 1
+    width = grid.width
+    neighbors = np.full(grid.neighbors.shape, -1, np.int32)
+    for coords, node in coordinate_nodes.items():
+        index = coords.y * width + coords.x
+        for k, neighbor in enumerate(node.neighbors):
+            neighbors[index, k] = neighbor.coords.y * width + neighbor.coords.x
 
-                if neighbor.ttype == ending_type:
-                    return neighbor
-                queue.put(neighbor)
+    return neighbors
 
 
-def get_nodes_on_shortest_paths_multiple(starting_nodes: List[Node], ending_type: Type[TType],
-                                         current_nodes: List[Node]) -> (Optional[Distances], Optional[Set[Node]]):
+@njit(nogil=True, cache=True)
+def get_grid_shortest_path_tiles(neighbors, is_traversable, is_ending,
+                                 starting_index: int) -> (int, np.ndarray, np.ndarray):
     """
-    Find all the Nodes that are on a possible shortest path to the given tile
-    type, from all the given starting coordinate_nodes.
+    Find the tiles that are on a possible shortest path to the closest ending
+    tiles, for a single starting tile of a GridGraph. The tiles are collected
+    with a depth-first search back from each ending tile in turn, following
+    the order of the neighbor rows.
+
+    Only indexing is used on the inputs, so they can be given as arrays when
+    the function is compiled, and as faster to index lists when it is not.
 
     Args:
-        starting_nodes: a list of starting coordinate_nodes
-        ending_type: a tile type to end a path on
-        current_nodes: a list of Nodes currently in the graph which are
-                       needed for resetting
+        neighbors: the neighbors of a GridGraph
+        is_traversable: booleans marking the traversable tiles
+        is_ending: booleans marking the tiles to end a path on
+        starting_index: the index of the starting tile
 
     Returns:
-        the distance of a shortest path, and all the Nodes on all the shortest
-        path from very starting Node, or None for both if there are no paths
-    """
-    dists = Distances()
-    path_nodes = set()
-
-    for starting_node in starting_nodes:
-        reset_nodes(current_nodes)
-        dist, nodes = get_nodes_on_shortest_paths(starting_node, ending_type,
-                                                  len(current_nodes))
+        the distance of a shortest path, the indices of the tiles collected
+        from each ending tile one after another, and the end of each ending
+        tile's part in those indices, or -1 and empty arrays if there are
+        no paths
+    """
+    tile_count = len(is_traversable)
+    neighbor_count = len(neighbors[0])
+    distances = [-1] * tile_count
+    queue = [0] * tile_count
+    ending_indices = []
+    distance = -1
+
+    distances[starting_index] = 0
+    queue[0] = starting_index
+    head = 0
+    tail = 1
+    while head < tail:
+        index = queue[head]
+        head += 1
+
+        # Look for other ending tiles with the same distance
+        if distance != -1:
+            if is_ending[index]:
+                ending_indices.append(index)
+            if distances[index] > distance:
+                break
+            continue
+
+        if is_ending[index]:
+            distance = distances[index]
+            ending_indices.append(index)
+            continue
+
+        for neighbor in neighbors[index]:
+            if neighbor != -1 and distances[neighbor] == -1 and is_traversable[neighbor]:
+                distances[neighbor] = distances[index] + 1
+                queue[tail] = neighbor
+                tail += 1
+
+    if distance == -1:
+        return -1, np.empty(0, np.int32), np.empty(0, np.int32)
+
+    # Collect the tiles with an iterative depth-first search from each ending tile
+    collected_parts = [-1] * tile_count
+    stack_indices = [0] * tile_count
+    stack_positions = [0] * tile_count
+    path_indices = []
+    part_ends = []
+    for part in range(len(ending_indices)):
+        stack_indices[0] = ending_indices[part]
+        stack_positions[0] = 0
+        depth = 1
+        while depth > 0:
+            index = stack_indices[depth - 1]
+            k = stack_positions[depth - 1]
+            if k == neighbor_count:
+                depth -= 1
+                continue
+            stack_positions[depth - 1] = k + 1
 
-        # End early on unsolvable mazes
-        if not dist:
-            return dist, nodes
+            neighbor = neighbors[index][k]
+            if neighbor == -1 or not is_traversable[neighbor] or collected_parts[neighbor] == part \
+                    or distances[neighbor] != distances[index] - 1 or distances[neighbor] == 0:
+                continue
 
-        dists.append(dist)
-        path_nodes.update(nodes)
+            collected_parts[neighbor] = part
+            path_indices.append(neighbor)
+            stack_indices[depth] = neighbor
+            stack_positions[depth] = 0
+            depth += 1
+        part_ends.append(len(path_indices))
 
-    return dists, path_nodes
+    return distance, np.array(path_indices, np.int32), np.array(part_ends, np.int32)
 
 
-def get_nodes_on_shortest_paths(starting_node: Node, ending_type: Type[TType],
-                                node_count: int) -> (Optional[int], Optional[Set[Node]]):
+def get_grid_tiles_on_shortest_paths_multiple(neighbors: np.ndarray, is_traversable: np.ndarray,
+                                              is_ending: np.ndarray, starting_indices: List[int],
+                                              tile_coords: List[Coords]) -> (Optional[Distances], Optional[Set[Coords]]):
     """
-    Find all the Nodes that are on a possible shortest path to the given tile
-    type, for the given single starting Nodes.
+    Find the coordinates of all the tiles that are on a possible shortest path
+    to the closest ending tiles, from all the given starting tiles of a
+    GridGraph. The returned set is built in the order the tiles are
+    collected, which the iteration order of the set depends on. The inputs
+    that stay the same between calls are expected to be prepared once with
+    as_kernel_input().
 
     Args:
-        starting_node: a starting Node
-        ending_type: a tile type to end a path on
-        node_count: maximum number of Nodes in a Queue
+        neighbors: the prepared neighbors of a GridGraph
+        is_traversable: a boolean array marking the traversable tiles
+        is_ending: prepared booleans marking the tiles to end a path on
+        starting_indices: the indices of the starting tiles
+        tile_coords: the Coords of each tile by its index
 
     Returns:
-        the distance of a shortest path, and all the Nodes on all the shortest
-        path, or None for both if there are no paths
+        the distance of a shortest path, and the Coords of all the tiles on
+        all the shortest paths from every starting tile, or None for both if
+        there are no paths
     """
-    starting_node.visited = True
-    starting_node.distance = 0
-    queue = Queue(maxsize=node_count - 1)
-    queue.put(starting_node)
-    while not queue.empty():
-        node = queue.get()
-        if node.ttype == ending_type:
-            distance = node.distance
-            path_nodes = collect_all_paths(node, set())
-
-            # Look for other ending Nodes with the same distance
-            while not queue.empty():
-                node = queue.get()
-                if node.ttype == ending_type:
-                    path_nodes.update(collect_all_paths(node, set()))
-                if node.distance > distance:
-                    break
+    is_traversable = as_kernel_input(is_traversable)
+    dists = Distances()
+    path_coords = set()
 
-            return distance, path_nodes
+    for starting_index in starting_indices:
+        dist, path_indices, part_ends = get_grid_shortest_path_tiles(neighbors, is_traversable,
+                                                                     is_ending, starting_index)
 
-        for neighbor in node.neighbors:
-            if not neighbor.visited and neighbor.ttype.is_traversable:
-                neighbor.visited = True
-                neighbor.distance = node.distance + 1
+        # End early on unsolvable mazes
+        if dist == -1:
+            return None, None
 
-                queue.put(neighbor)
+        dists.append(dist)
+        path_indices = path_indices.tolist()
+        part_start = 0
+        starting_coords = None
+        for part_end in part_ends.tolist():
+            part_coords = {tile_coords[index] for index in path_indices[part_start:part_end]}
+            if starting_coords is None:
+                starting_coords = part_coords
+            else:
+                starting_coords.update(part_coords)
+            part_start = part_end
+        path_coords.update(starting_coords)
 
-    return None, None
+    return dists, path_coords
 
 
-def collect_all_paths(node: Node, collected: Set[Node]) -> Set[Node]:
+def unvisit_nodes(nodes: List[Node]) -> None:
     """
-    Collect all the traversable Nodes on all the possible paths to the given
-    Node using recursive depth-first-search. The starting Node of a path is
-    assumed to have a distance of 0.
+    Mark all given Nodes as not visited, while not resetting the neighbors.
 
     Args:
-        node: final Node on a path
-        collected: a set of collected Notes
-
-    Returns:
-        a list of collected Notes on the path towards 0 distance.
+        nodes: a list of resetable Nodes
     """
-    for neighbor in node.neighbors:
-
-        if neighbor.ttype.is_traversable and neighbor.distance == node.distance - 1\
-                and neighbor not in collected:
-
-            if neighbor.distance == 0:
-                continue
-
-            collected.add(neighbor)
-
-            collected = collect_all_paths(neighbor, collected)
-
-    return collected
+    for node in nodes:
+        node.visited = False
 
 
-def get_distances(starting_nodes: List[Node], ending_type: Type[TType],
-                  current_nodes: List[Node]) -> Optional[Distances]:
+def get_closest_distances(starting_nodes: List[Node], ending_type: Type[TType],
+                          current_nodes: List[Node]) -> List[Optional[int]]:
     """
-    Calculate and return the distances between starting Nodes and their
-    closest Nodes with the corresponding tile type.
+    Calculate the distances between starting Nodes and their closest Nodes
+    with the corresponding tile type, with a single breadth-first search
+    outwards from all the Nodes of that type. The search stops once every
+    starting Node is reached.
 
     Args:
         starting_nodes: a list of starting Nodes
         ending_type: a tile type to count the distances to
         current_nodes: a list of Nodes currently in the graph which are
-                       needed for resetting
+                       needed for resetting, including the ending Nodes
 
     Returns:
-        a Distances object with distances of each starting Node, or None
-        if even a single path is unavailable
-    """
-    dists = Distances()
-    node_count = len(current_nodes)
-    for start_node in starting_nodes:
-        unvisit_nodes(current_nodes)
-        dist = get_shortest_distance_any(start_node, ending_type,
-                                         node_count)
-        if not dist:
-            return None
-        dists.append(dist)
-    return dists
+        a list with the distance of each starting Node, with None for the
+        ones without a path
+    """
+    unvisit_nodes(current_nodes)
+    # Keyed by the Node ids, which are much faster to hash than the Nodes
+    distances = {id(node): None for node in starting_nodes}
+    remaining = len(distances)
+
+    level = [node for node in current_nodes if node.ttype is ending_type]
+    for node in level:
+        node.visited = True
+    distance = 0
+    while level and remaining:
+        distance += 1
+        next_level = []
+        for node in level:
+            for neighbor in node.neighbors:
+                if not neighbor.visited and neighbor.ttype.is_traversable:
+                    neighbor.visited = True
+                    next_level.append(neighbor)
+                    if id(neighbor) in distances:
+                        distances[id(neighbor)] = distance
+                        remaining -= 1
+        level = next_level
+
+    return [distances[id(node)] for node in starting_nodes]
 
 
 def get_maxmin_distance(starting_nodes: List[Node], ending_type: Type[TType],
@@ -425,41 +544,40 @@ def get_maxmin_distance(starting_nodes: List[Node], ending_type: Type[TType],
         starting_nodes: a list of starting Nodes
         ending_type: a tile type to count the distance to
         current_nodes: a list of Nodes currently in the graph which are
-                       needed for resetting
+                       needed for resetting, including the ending Nodes
     Returns:
         the maxmin distance between the starting Nodes and Nodes corresponding
         to the given tile type, or None if no path is available
     """
-    maxmin_distance = None
-    node_count = len(current_nodes)
-    for start_node in starting_nodes:
-        unvisit_nodes(current_nodes)
-        dist = get_shortest_distance_any(start_node, ending_type,
-                                         node_count)
-        if not maxmin_distance or (dist and dist > maxmin_distance):
-            maxmin_distance = dist
+    dists = [dist for dist in get_closest_distances(starting_nodes, ending_type, current_nodes) if dist]
+    return max(dists) if dists else None
 
-    return maxmin_distance
 
-
-def get_cluster_of_nodes(current_node: Node) -> List[Node]:
+def get_cluster_of_nodes(starting_node: Node) -> List[Node]:
     """
-    Recursively find a cluster of Nodes that share the same tile type. A cluster
-    contains one or more Nodes where they are all connected via neighbors.
+    Find a cluster of Nodes that share the same tile type with an iterative
+    depth-first search. A cluster contains one or more Nodes where they are
+    all connected via neighbors.
 
     Args:
-        current_node: the current Node whose neighbors are checked
+        starting_node: the Node whose cluster is found
 
     Returns:
         a list of connected coordinate_nodes, sharing the same tile type
     """
-    cluster = []
-    current_node.visited = True
-    cluster.append(current_node)
-    node_type = current_node.ttype
-    for neighbor in current_node.neighbors:
-        if neighbor.ttype == node_type and not neighbor.visited:
-            cluster += get_cluster_of_nodes(neighbor)
+    node_type = starting_node.ttype
+    cluster = [starting_node]
+    collected = {id(starting_node)}
+    stack = [iter(starting_node.neighbors)]
+    while stack:
+        for neighbor in stack[-1]:
+            if neighbor.ttype is node_type and id(neighbor) not in collected:
+                collected.add(id(neighbor))
+                cluster.append(neighbor)
+                stack.append(iter(neighbor.neighbors))
+                break
+        else:
+            stack.pop()
 
     return cluster
 
@@ -478,7 +596,7 @@ def get_center_coords(nodes: List[Node]) -> List[Coords]:
     center_coords = []
     for node in nodes:
         same_neighbor_coords = [neighbor.coords for neighbor in node.neighbors
-                                if neighbor.ttype == node.ttype]
+                                if neighbor.ttype is node.ttype]
         x_coords = [coords.x for coords in same_neighbor_coords]
         y_coords = [coords.y for coords in same_neighbor_coords]
         x_max = max(x_coords)
@@ -509,7 +627,7 @@ def get_surrounded_coords(nodes: List[Node]) -> List[Coords]:
         neighbor_ttypes = [neighbor.ttype for neighbor in node.neighbors]
         surrounded = True
         for ttype in neighbor_ttypes:
-            if ttype != node.ttype:
+            if ttype is not node.ttype:
                 surrounded = False
                 break
         if surrounded: